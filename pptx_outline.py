@@ -0,0 +1,40 @@
+from io import BytesIO
+from pptx import Presentation # Ensure pptx is installed: pip install python-pptx
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+
+def _shape_texts(shapes, skip_shape_id=None):
+    """Collects the text of shapes, descending into group shapes and reading table cells row by row."""
+    texts = []
+    for shape in shapes:
+        if shape.shape_id == skip_shape_id:
+            continue
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            texts.extend(_shape_texts(shape.shapes))
+        elif shape.has_table:
+            rows = [" | ".join(cell.text for cell in row.cells) for row in shape.table.rows]
+            table_text = "\n".join(row for row in rows if row.strip(" |"))
+            if table_text:
+                texts.append(table_text)
+        elif shape.has_text_frame and shape.text_frame.text.strip():
+            texts.append(shape.text_frame.text)
+    return texts
+
+
+# Kept in its own module so spawned ProcessPoolExecutor workers can import it by reference
+def extract_pptx_outline(file_content):
+    """Extracts the title, body text and speaker notes of every slide of a PowerPoint deck."""
+    prs = Presentation(BytesIO(file_content))
+    slides = []
+    for number, slide in enumerate(prs.slides, start=1):
+        title_shape = slide.shapes.title
+        notes = ""
+        if slide.has_notes_slide and slide.notes_slide.notes_text_frame is not None:
+            notes = slide.notes_slide.notes_text_frame.text
+        slides.append({
+            'number': number,
+            'title': title_shape.text_frame.text if title_shape is not None and title_shape.has_text_frame else "",
+            'text': "\n\n".join(_shape_texts(slide.shapes, title_shape.shape_id if title_shape is not None else None)),
+            'notes': notes,
+        })
+    return slides
@@ -2,12 +2,20 @@ import streamlit as st
 import supabase
 import boto3
 import os
-from botocore.exceptions import NoCredentialsError, ClientError
+from botocore.exceptions import BotoCoreError, NoCredentialsError, ClientError
 import math # For pagination
+import multiprocessing
 import pandas as pd
 from io import BytesIO
 import base64
-from pptx import Presentation # Ensure pptx is installed: pip install python-pptx
+import hashlib
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pptx_outline import extract_pptx_outline
 
 
 # Initialize Supabase client
@@ -29,6 +37,18 @@ s3_client = boto3.client(
 
 KEY_PREFIX = "s3_file_manager" # To avoid session state conflicts
 ITEMS_PER_PAGE_OPTIONS = [5, 10, 25, 50, 100] # Pagination options
+HASH_CHUNK_SIZE = 1024 * 1024 # Read uploads in 1 MB chunks when hashing
+CHECKSUM_METADATA_KEY = "md5" # User metadata key holding the content MD5 of uploaded objects
+EXCEL_PREVIEW_ROW_OPTIONS = [50, 100, 500, 1000] # Rows read from a sheet for the Excel preview
+PREVIEW_PROCESS_WORKERS = 2 # Worker processes for CPU-heavy preview parsing (PowerPoint)
+PPTX_SLIDES_PER_BATCH = 10 # Slides rendered at first and per "Show more" click
+LISTING_CACHE_MAX_ENTRIES = 256 # Folder listings kept in memory (shared by all sessions)
+LISTING_CACHE_MAX_ITEMS = 100_000 # Files and folders held across all cached listings, to bound memory
+PREFETCH_MAX_LISTING_ITEMS = 2_000 # Prefetched listings larger than this are not cached
+LISTING_CACHE_TTL_SECONDS = 30 # How long a cached or prefetched listing is served before refetching
+PREFETCH_WORKERS = 4 # Background threads fetching listings the user is likely to open next
+PREFETCH_MAX_PER_SESSION = 8 # Prefetches a single session may have queued or running at once
+LISTING_SNAPSHOT_MAX_ENTRIES = 16 # Folder snapshots kept per session for delta refreshes
 
 # --- Session State Initialization ---
 def _init_session_state():
@@ -65,6 +85,16 @@ def _init_session_state():
         st.session_state[KEY_PREFIX + '_items_per_page'] = ITEMS_PER_PAGE_OPTIONS[1] # Default to 10 items per page
     if KEY_PREFIX + '_delete_confirmation' not in st.session_state:
         st.session_state[KEY_PREFIX + '_delete_confirmation'] = {} # Dict to hold confirmation state for each item
+    if KEY_PREFIX + '_incremental_sync' not in st.session_state:
+        st.session_state[KEY_PREFIX + '_incremental_sync'] = True # Skip files that are already in S3 with the same content
+    if KEY_PREFIX + '_sync_summary' not in st.session_state:
+        st.session_state[KEY_PREFIX + '_sync_summary'] = None # Result of the last incremental sync, shown once
+    if KEY_PREFIX + '_prefetch_futures' not in st.session_state:
+        st.session_state[KEY_PREFIX + '_prefetch_futures'] = {} # Prefix -> Future of this session's pending prefetches
+    if KEY_PREFIX + '_prefetch_path' not in st.session_state:
+        st.session_state[KEY_PREFIX + '_prefetch_path'] = None # Folder the pending prefetches were scheduled from
+    if KEY_PREFIX + '_listing_snapshots' not in st.session_state:
+        st.session_state[KEY_PREFIX + '_listing_snapshots'] = {} # Prefix -> last listing and its sorted items, for delta refreshes
 
 # @st.cache_data(show_spinner=False, ttl=10)
 def list_files_in_folder(folder_path):
@@ -73,33 +103,193 @@ def list_files_in_folder(folder_path):
     full_file_paths = files  # Files from list_s3_files already have the correct path
     return full_file_paths
 
-# @st.cache_data(show_spinner=False, ttl=10) # Caching for performance - adjust ttl as needed
+def _fetch_s3_listing(prefix):
+    """Fetches the folders and files directly under a prefix. Raises on S3 errors; safe to call from worker threads.
+
+    Files are returned as a dict of S3 key -> (ETag, LastModified, Size).
+    """
+    paginator = s3_client.get_paginator('list_objects_v2') # A single call stops at 1000 keys
+    files = {}
+    folders = []
+    for page in paginator.paginate(Bucket=SUPABASE_S3_BUCKET_NAME, Prefix=prefix, Delimiter='/'): # Delimiter for folders
+        for prefix_info in page.get('CommonPrefixes', []): # Folders are returned in CommonPrefixes
+            folders.append(prefix_info['Prefix'])
+        for obj in page.get('Contents', []): # Files are in Contents
+            if not obj['Key'].endswith('/'): # Exclude folder "placeholders"
+                files[obj['Key']] = (obj.get('ETag'), obj.get('LastModified'), obj.get('Size'))
+    return folders, files
+
+@st.cache_resource
+def _get_listing_cache():
+    """Bounded LRU of prefix -> (fetched_at, folders, files), shared by the UI and the prefetch workers.
+
+    'in_flight' maps each prefix being fetched to [pending fetches, generation]; invalidations bump the
+    generation so a fetch that started before them doesn't write its stale listing back. 'total_items' counts
+    the files and folders across all entries, so memory stays bounded even for very large folders.
+    """
+    return {'lock': threading.Lock(), 'entries': OrderedDict(), 'in_flight': {}, 'total_items': 0}
+
+def _listing_size(folders, files):
+    return len(folders) + len(files)
+
+def _listing_cache_evict(cache, prefix):
+    """Removes a cached listing and its item count. The caller must hold cache['lock']."""
+    entry = cache['entries'].pop(prefix, None)
+    if entry is not None:
+        cache['total_items'] -= _listing_size(entry[1], entry[2])
+
+def _listing_cache_get(prefix, cache=None):
+    """Returns a fresh cached (folders, files) listing for a prefix, or None."""
+    cache = cache or _get_listing_cache() # Worker threads pass the cache in, as they have no script run context
+    with cache['lock']:
+        entry = cache['entries'].get(prefix)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > LISTING_CACHE_TTL_SECONDS:
+            _listing_cache_evict(cache, prefix)
+            return None
+        cache['entries'].move_to_end(prefix)
+        return entry[1], entry[2]
+
+def _listing_cache_begin(prefix, cache=None):
+    """Registers a fetch of a prefix and returns the generation to pass to _listing_cache_finish."""
+    cache = cache or _get_listing_cache()
+    with cache['lock']:
+        in_flight = cache['in_flight'].setdefault(prefix, [0, 0])
+        in_flight[0] += 1
+        return in_flight[1]
+
+def _listing_cache_finish(prefix, generation, listing, cache=None, max_items=LISTING_CACHE_MAX_ITEMS):
+    """Ends a fetch and stores its (folders, files) listing, unless it failed (None), the prefix was invalidated
+    meanwhile, or the listing has more than max_items entries.
+
+    Evicts the least recently used listings beyond LISTING_CACHE_MAX_ENTRIES or LISTING_CACHE_MAX_ITEMS.
+    """
+    cache = cache or _get_listing_cache()
+    with cache['lock']:
+        in_flight = cache['in_flight'][prefix]
+        in_flight[0] -= 1
+        invalidated = in_flight[1] != generation
+        if in_flight[0] == 0:
+            del cache['in_flight'][prefix]
+        if listing is None or invalidated:
+            return
+        _listing_cache_evict(cache, prefix) # Replaces any older listing of the prefix
+        size = _listing_size(*listing)
+        if size > min(max_items, LISTING_CACHE_MAX_ITEMS):
+            return
+        cache['entries'][prefix] = (time.monotonic(), *listing)
+        cache['total_items'] += size
+        while len(cache['entries']) > LISTING_CACHE_MAX_ENTRIES or cache['total_items'] > LISTING_CACHE_MAX_ITEMS:
+            _listing_cache_evict(cache, next(iter(cache['entries']))) # Evict the least recently used listing
+
+def invalidate_listing_cache(s3_key):
+    """Drops cached listings affected by a change to s3_key: its parent folder and, for folders, everything below it."""
+    parent = os.path.dirname(s3_key.rstrip('/'))
+    parent_prefix = parent + "/" if parent else ""
+    folder_prefix = s3_key.rstrip('/') + "/"
+    cache = _get_listing_cache()
+    with cache['lock']:
+        for prefix in [p for p in cache['entries'] if p == parent_prefix or p.startswith(folder_prefix)]:
+            _listing_cache_evict(cache, prefix)
+        for prefix, in_flight in cache['in_flight'].items():
+            if prefix == parent_prefix or prefix.startswith(folder_prefix):
+                in_flight[1] += 1 # Fetches already running for this prefix must not cache their result
+
+def _fetch_s3_listing_cached(prefix, cache=None, max_items=LISTING_CACHE_MAX_ITEMS):
+    """Fetches a listing and stores it in the listing cache. Raises on S3 errors, like _fetch_s3_listing."""
+    generation = _listing_cache_begin(prefix, cache)
+    listing = None
+    try:
+        listing = _fetch_s3_listing(prefix)
+        return listing
+    finally:
+        _listing_cache_finish(prefix, generation, listing, cache, max_items)
+
 def list_s3_files(prefix=""):
     """Lists files and folders in an S3 bucket under a given prefix."""
+    folders, files = list_s3_entries(prefix)
+    return folders, list(files)
+
+def list_s3_entries(prefix=""):
+    """Lists folders and file metadata (S3 key -> (ETag, LastModified, Size)) under a prefix, served from the listing cache when fresh."""
+    cached = _listing_cache_get(prefix)
+    if cached is not None:
+        return cached
     try:
-        response = s3_client.list_objects_v2(Bucket=SUPABASE_S3_BUCKET_NAME, Prefix=prefix, Delimiter='/') # Delimiter for folders
-        files = []
-        folders = []
-        if 'CommonPrefixes' in response: # Folders are returned in CommonPrefixes
-            for prefix_info in response['CommonPrefixes']:
-                folders.append(prefix_info['Prefix'])
-        if 'Contents' in response: # Files are in Contents
-            for obj in response['Contents']:
-                if not obj['Key'].endswith('/'): # Exclude folder "placeholders"
-                    files.append(obj['Key'])
-        return folders, files
+        return _fetch_s3_listing_cached(prefix)
 
     except NoCredentialsError:
         st.error("AWS credentials not available.")
-        return [], []
+        return [], {}
     except ClientError as e:
         st.error(f"Error accessing S3: {e}")
-        return [], []
+        return [], {}
+
+@st.cache_resource
+def _get_prefetch_executor():
+    """Small thread pool shared by all sessions for background listing prefetches."""
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="s3_prefetch")
 
-def upload_file_to_s3(file, s3_key):
-    """Uploads a file-like object to S3."""
+def _prefetch_listing(prefix, cache):
+    """Worker: fetches a listing into the cache. Errors are ignored; the UI refetches and reports them on click."""
+    if _listing_cache_get(prefix, cache) is not None:
+        return
     try:
-        s3_client.upload_fileobj(file, SUPABASE_S3_BUCKET_NAME, s3_key)
+        _fetch_s3_listing_cached(prefix, cache, max_items=PREFETCH_MAX_LISTING_ITEMS) # Nobody asked for it yet, so don't let it fill the cache
+    except Exception as e:
+        print(f"Prefetch of '{prefix}' failed: {e}")
+
+def _schedule_prefetch(current_path, prefixes):
+    """Queues background listings for the folders the user is likely to open next.
+
+    Prefetches still queued from a previously viewed folder are cancelled, and a session never has more
+    than PREFETCH_MAX_PER_SESSION prefetches pending.
+    """
+    futures = st.session_state[KEY_PREFIX + '_prefetch_futures']
+    if st.session_state[KEY_PREFIX + '_prefetch_path'] != current_path: # User navigated away
+        for future in futures.values():
+            future.cancel() # Only cancels prefetches that have not started yet
+        futures.clear()
+        st.session_state[KEY_PREFIX + '_prefetch_path'] = current_path
+    for prefix in [p for p, future in futures.items() if future.done()]:
+        del futures[prefix]
+
+    executor = _get_prefetch_executor()
+    cache = _get_listing_cache()
+    for prefix in prefixes:
+        if len(futures) >= PREFETCH_MAX_PER_SESSION:
+            break
+        if prefix in futures or _listing_cache_get(prefix, cache) is not None:
+            continue
+        futures[prefix] = executor.submit(_prefetch_listing, prefix, cache)
+
+def _compute_md5(file) -> str:
+    """Hashes a file-like object in chunks and rewinds it so it can still be uploaded."""
+    file.seek(0)
+    digest = hashlib.md5()
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+def _get_remote_md5(s3_key, etag):
+    """Returns the content MD5 of an existing S3 object, or None if it cannot be determined."""
+    etag = (etag or '').strip('"')
+    if etag and '-' not in etag: # Single-part upload: the ETag is the MD5 of the content
+        return etag
+    try: # Multipart upload: fall back to the checksum we stored as user metadata
+        response = s3_client.head_object(Bucket=SUPABASE_S3_BUCKET_NAME, Key=s3_key)
+        return response.get('Metadata', {}).get(CHECKSUM_METADATA_KEY)
+    except (BotoCoreError, ClientError): # Includes NoCredentialsError and connection errors; the file is just not skippable
+        return None
+
+def upload_file_to_s3(file, s3_key, metadata=None):
+    """Uploads a file-like object to S3, optionally attaching user metadata."""
+    try:
+        extra_args = {'Metadata': metadata} if metadata else None
+        s3_client.upload_fileobj(file, SUPABASE_S3_BUCKET_NAME, s3_key, ExtraArgs=extra_args)
+        invalidate_listing_cache(s3_key)
         return True
     except NoCredentialsError:
         st.error("AWS credentials not available.")
@@ -108,6 +298,36 @@ def upload_file_to_s3(file, s3_key):
         st.error(f"Error uploading to S3: {e}")
         return False
 
+def sync_files_to_s3(files, prefix):
+    """Uploads only new or changed files under a prefix, skipping objects whose content is already in S3.
+
+    Returns a dict with the 'uploaded', 'skipped' and 'failed' S3 keys.
+    """
+    summary = {'uploaded': [], 'skipped': [], 'failed': []}
+    try:
+        _, remote_files = _fetch_s3_listing_cached(prefix) # Always a fresh listing (skips must not rely on a stale cache), which also refreshes it
+    except NoCredentialsError:
+        st.error("AWS credentials not available.")
+        remote_files = {} # Nothing can be compared, so nothing is skipped
+    except ClientError as e:
+        st.error(f"Error accessing S3: {e}")
+        remote_files = {}
+
+    for file in files:
+        s3_key = os.path.join(prefix, file.name)
+        local_md5 = _compute_md5(file)
+        listing_entry = remote_files.get(s3_key) # (ETag, LastModified, Size)
+        if listing_entry is not None and listing_entry[2] == file.size:
+            if _get_remote_md5(s3_key, listing_entry[0]) == local_md5:
+                summary['skipped'].append(s3_key)
+                continue
+
+        if upload_file_to_s3(file, s3_key, metadata={CHECKSUM_METADATA_KEY: local_md5}):
+            summary['uploaded'].append(s3_key)
+        else:
+            summary['failed'].append(s3_key)
+    return summary
+
 def download_file_from_s3(s3_key):
     """Downloads a file from S3 and returns its content as bytes."""
     try:
@@ -122,6 +342,71 @@ def download_file_from_s3(s3_key):
         st.error(f"Error downloading file from S3: {e}")
         return None
 
+def get_s3_etag(s3_key):
+    """Returns the ETag of an S3 object, used to key caches on the object's version."""
+    try:
+        response = s3_client.head_object(Bucket=SUPABASE_S3_BUCKET_NAME, Key=s3_key)
+        return response['ETag']
+    except NoCredentialsError:
+        st.error("AWS credentials not available.")
+        return None
+    except ClientError as e:
+        st.error(f"Error reading file metadata from S3: {e}")
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=2, ttl=60) # Raw files can be large; keep only a couple, briefly
+def _download_file_cached(s3_key, etag):
+    """Downloads a file once per (key, ETag) so switching sheets or rows right after opening a preview skips S3."""
+    file_content = download_file_from_s3(s3_key)
+    if file_content is None:
+        raise IOError(f"Failed to download '{s3_key}' from S3.") # Exceptions are not cached, so the next rerun retries
+    return file_content
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_excel_preview(s3_key, etag, sheet_name, n_rows):
+    """Reads the first n_rows of one sheet of an Excel workbook without loading the whole sheet.
+
+    Returns the workbook's sheet names and a DataFrame for the requested sheet (the first sheet if
+    sheet_name is None or no longer exists).
+    """
+    file_content = _download_file_cached(s3_key, etag)
+    engine = 'xlrd' if s3_key.endswith(".xls") else 'openpyxl' # pandas opens .xlsx with openpyxl in read-only mode
+    with pd.ExcelFile(BytesIO(file_content), engine=engine) as excel_file:
+        sheet_names = excel_file.sheet_names
+        df = excel_file.parse(sheet_name if sheet_name in sheet_names else sheet_names[0], nrows=n_rows)
+    return sheet_names, df
+
+@st.cache_resource
+def _get_preview_process_pool():
+    """Process pool shared by all sessions, so parsing large files doesn't hold the server's GIL.
+
+    Workers are spawned rather than forked, as forking the multithreaded server process can deadlock. Under
+    `streamlit run` the process's __main__ is the Streamlit CLI, so workers never import this script; they only
+    import pptx_outline, which must stay free of Streamlit and app setup code.
+    """
+    return ProcessPoolExecutor(max_workers=PREVIEW_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_pptx_outline(s3_key, etag):
+    """Extracts the slide outline of a PowerPoint deck in a worker process, once per (key, ETag)."""
+    file_content = _download_file_cached(s3_key, etag)
+    try:
+        return _get_preview_process_pool().submit(extract_pptx_outline, file_content).result()
+    except BrokenProcessPool:
+        _get_preview_process_pool.clear() # A worker died; start a fresh pool on the next attempt
+        raise
+
+def _render_pptx_slides(slides):
+    """Renders extracted slide outlines as one bordered container per slide."""
+    for slide in slides:
+        with st.container(border=True):
+            st.markdown(f"**Slide {slide['number']}: {slide['title'] or 'Untitled'}**")
+            if slide['text']:
+                st.text(slide['text'])
+            if slide['notes']:
+                with st.expander("Speaker notes"):
+                    st.text(slide['notes'])
+
 def delete_file_from_s3(s3_key):
     """Deletes a file from S3 after checking if it exists."""
     sanitized_key = sanitize_path(s3_key)  # Sanitize the S3 key
@@ -132,6 +417,7 @@ def delete_file_from_s3(s3_key):
         # Proceed to delete
         delete_response = s3_client.delete_object(Bucket=SUPABASE_S3_BUCKET_NAME, Key=sanitized_key)
         print(f"Delete response: {delete_response}")
+        invalidate_listing_cache(sanitized_key)
         return True, s3_key # Return True and the s3_key of the deleted file
     except ClientError as e:
         if e.response['Error']['Code'] == '404':
@@ -145,6 +431,7 @@ def create_s3_folder(s3_folder_key):
     sanitized_folder_key = sanitize_path(s3_folder_key)  # Sanitize the folder key
     try:
         s3_client.put_object(Bucket=SUPABASE_S3_BUCKET_NAME, Key=f"{sanitized_folder_key}/") # Keys for folders must end with '/'
+        invalidate_listing_cache(sanitized_folder_key)
         return True
     except NoCredentialsError:
         st.error("AWS credentials not available.")
@@ -185,6 +472,7 @@ def delete_s3_folder(s3_folder_prefix):
         else:
             print(f"Error deleting placeholder object '{placeholder_key}': {e}")
 
+    invalidate_listing_cache(sanitized_prefix)
     return True
 
 
@@ -237,6 +525,71 @@ def _render_pagination(total_items: int):
                 st.session_state[KEY_PREFIX + '_current_page'] = total_pages
                 st.rerun()
 
+def _item_sort_key(item):
+    """Folders first, then case-insensitive by name."""
+    return (not item['is_directory'], item['name'].lower())
+
+def _make_listing_item(path, is_directory, size=None):
+    name = os.path.basename(path.rstrip('/')) if is_directory else os.path.basename(path)
+    return {'name': name, 'path': path, 'is_directory': is_directory, 'size': size}
+
+def _find_listing_item(snapshot, path, sort_key):
+    """Returns the index of the item with this path in the snapshot's sorted items, or None."""
+    i = bisect.bisect_left(snapshot['sort_keys'], sort_key)
+    while i < len(snapshot['items']) and snapshot['sort_keys'][i] == sort_key: # Names may differ only by case
+        if snapshot['items'][i]['path'] == path:
+            return i
+        i += 1
+    return None
+
+def _apply_listing_delta(snapshot, folders, files):
+    """Updates a prefix snapshot in place from a fresh listing, touching only added, removed and changed entries.
+
+    Files count as changed when their ETag or LastModified differ from the snapshot.
+    """
+    new_folders = set(folders)
+    removed = [_make_listing_item(path, True) for path in snapshot['folders'] - new_folders] + \
+              [_make_listing_item(path, False) for path in snapshot['files'].keys() - files.keys()]
+    added = [_make_listing_item(path, True) for path in new_folders - snapshot['folders']] + \
+            [_make_listing_item(path, False, files[path][2]) for path in files.keys() - snapshot['files'].keys()]
+
+    for item in removed:
+        index = _find_listing_item(snapshot, item['path'], _item_sort_key(item))
+        if index is not None:
+            del snapshot['items'][index]
+            del snapshot['sort_keys'][index]
+    for item in added:
+        sort_key = _item_sort_key(item)
+        index = bisect.bisect_right(snapshot['sort_keys'], sort_key)
+        snapshot['items'].insert(index, item)
+        snapshot['sort_keys'].insert(index, sort_key)
+    for path, (etag, last_modified, size) in files.items():
+        old_entry = snapshot['files'].get(path)
+        if old_entry is not None and old_entry[:2] != (etag, last_modified):
+            index = _find_listing_item(snapshot, path, _item_sort_key(_make_listing_item(path, False)))
+            if index is not None:
+                snapshot['items'][index]['size'] = size
+
+    snapshot['folders'] = new_folders
+    snapshot['files'] = files
+
+def get_listing_items(prefix):
+    """Returns the sorted folder/file items under a prefix, refreshed incrementally from the previous snapshot."""
+    folders, files = list_s3_entries(prefix)
+    snapshots = st.session_state[KEY_PREFIX + '_listing_snapshots']
+    snapshot = snapshots.pop(prefix, None) # Re-inserted below so the dict stays in least recently used order
+    if snapshot is None:
+        items = sorted([_make_listing_item(path, False, meta[2]) for path, meta in files.items()] +
+                       [_make_listing_item(path, True) for path in folders],
+                       key=_item_sort_key)
+        snapshot = {'folders': set(folders), 'files': files, 'items': items, 'sort_keys': [_item_sort_key(item) for item in items]}
+    elif snapshot['files'] is not files: # Same cached listing as last run means nothing changed
+        _apply_listing_delta(snapshot, folders, files)
+    snapshots[prefix] = snapshot
+    while len(snapshots) > LISTING_SNAPSHOT_MAX_ENTRIES:
+        del snapshots[next(iter(snapshots))] # Evict the least recently viewed folder
+    return snapshot['items']
+
 def get_file_type_from_extension(filename: str) -> str:
     """Extracts file type from filename extension."""
     _, ext = os.path.splitext(filename)
@@ -290,10 +643,7 @@ def render_folder_management_ui():
         else:
             st.warning(f"Path display column index out of range for component: {component}. This should not happen, please report.")  # Debugging warning
 
-    folders_in_folder, files_in_folder = list_s3_files(prefix=current_path)
-    items = sorted([{'name': os.path.basename(f_name), 'path': f_name, 'is_directory': False, 'size': None} for f_name in files_in_folder] + # USE f_name directly for file path
-                   [{'name': os.path.basename(f_prefix.rstrip('/')), 'path': f_prefix, 'is_directory': True, 'size': None} for f_prefix in folders_in_folder],
-                   key=lambda x: (not x['is_directory'], x['name'].lower()))
+    items = get_listing_items(current_path)
 
     start_idx = (st.session_state[KEY_PREFIX + '_current_page'] - 1) * st.session_state[KEY_PREFIX + '_items_per_page']
     end_idx = start_idx + st.session_state[KEY_PREFIX + '_items_per_page']
@@ -369,13 +719,10 @@ def render_folder_management_ui():
 
             with col_size:
                 if not item['is_directory']:
-                    # Get file size (inefficient to get size for each file in list, consider optimizing if needed)
-                    try:
-                        response = s3_client.head_object(Bucket=SUPABASE_S3_BUCKET_NAME, Key=item['path'])
-                        file_size = response['ContentLength']
-                        st.text(_format_size(file_size))
-                    except ClientError as e:
-                        st.text("Size N/A") # Handle errors getting file size
+                    if item['size'] is not None: # Size comes from the listing, no per-file request needed
+                        st.text(_format_size(item['size']))
+                    else:
+                        st.text("Size N/A")
                 else:
                     st.empty() # No size for folders
             with col_actions:
@@ -434,10 +781,15 @@ def render_folder_management_ui():
                             else:
                                 st.error(f"Failed to delete file '{item['name']}'.")
 
-    elif folders_in_folder or files_in_folder: # If folder is not empty but no items to display on current page
+    elif items: # If folder is not empty but no items to display on current page
         st.info(f"No items to display on page {st.session_state[KEY_PREFIX + '_current_page']}. Please use pagination controls to navigate.")
     else:
         st.info("This folder is empty.")
+
+    # Warm the listings of the visible subfolders, then of the folders on the next page. Runs on every
+    # render, even for empty pages, so prefetches queued from a previous folder are always cancelled.
+    next_page_items = items[end_idx:end_idx + st.session_state[KEY_PREFIX + '_items_per_page']]
+    _schedule_prefetch(current_path, [item['path'] for item in paginated_items + next_page_items if item['is_directory']])
     _render_pagination(len(items))  # Pagination below the list
 
     # Display Selected Paths Section in DataFrame
@@ -547,24 +899,50 @@ def render_action_buttons():
                 st.warning("No folders selected for deletion.")
 
 
+def _render_sync_summary():
+    """Shows the result of the last incremental sync once, then clears it."""
+    summary = st.session_state[KEY_PREFIX + '_sync_summary']
+    if not summary:
+        return
+    st.session_state[KEY_PREFIX + '_sync_summary'] = None
+    if summary['uploaded']:
+        st.success(f"Uploaded {len(summary['uploaded'])} new or changed file(s).")
+    if summary['skipped']:
+        st.info(f"Skipped {len(summary['skipped'])} unchanged file(s).")
+    if summary['failed']:
+        st.error(f"Failed to upload {len(summary['failed'])} file(s): {', '.join(os.path.basename(f) for f in summary['failed'])}")
+
+def _refresh_selected_files_in_current_folder():
+    """Re-lists the current folder's files if it is selected, so uploads show up in the selection."""
+    if st.session_state[KEY_PREFIX + '_current_path'] in st.session_state[KEY_PREFIX + '_selected_folders']:
+        # Re-list files in the current (selected) folder and update selected_files_in_folders
+        files_in_current_folder = list_files_in_folder(st.session_state[KEY_PREFIX + '_current_path'])
+        # Remove files from current folder and then add the new list to avoid duplicates
+        st.session_state[KEY_PREFIX + '_selected_files_in_folders'] = [
+            f for f in st.session_state[KEY_PREFIX + '_selected_files_in_folders']
+            if not f.startswith(st.session_state[KEY_PREFIX + '_current_path'])
+        ]
+        st.session_state[KEY_PREFIX + '_selected_files_in_folders'].extend(files_in_current_folder)
+
 def render_upload_section():
+    _render_sync_summary()
     if st.session_state[KEY_PREFIX + '_show_upload']:
         with st.expander("📤 Upload Files", expanded=True): # Expander for upload section
+            st.checkbox("Skip unchanged files (incremental sync)", key=KEY_PREFIX + '_incremental_sync', help="Compare file checksums with S3 and only upload new or changed files.")
             uploaded_files = st.file_uploader("Choose files to upload", accept_multiple_files=True, key=KEY_PREFIX + "_file_uploader")
-            if uploaded_files:
+            if uploaded_files and st.session_state[KEY_PREFIX + '_incremental_sync']:
+                summary = sync_files_to_s3(uploaded_files, st.session_state[KEY_PREFIX + '_current_path'])
+                if summary['uploaded']:
+                    _refresh_selected_files_in_current_folder()
+                st.session_state[KEY_PREFIX + '_sync_summary'] = summary # Shown after the rerun
+                st.session_state[KEY_PREFIX + '_show_upload'] = False # Hide upload section after upload
+                st.rerun() # Refresh file list after upload
+            elif uploaded_files:
                 for uploaded_file in uploaded_files:
                     s3_key_upload = os.path.join(st.session_state[KEY_PREFIX + '_current_path'], uploaded_file.name) # Construct S3 key with folder path
                     if upload_file_to_s3(uploaded_file, s3_key_upload):
                         st.success(f"File '{uploaded_file.name}' uploaded to '{s3_key_upload}'")
-                        if st.session_state[KEY_PREFIX + '_current_path'] in st.session_state[KEY_PREFIX + '_selected_folders']:
-                            # Re-list files in the current (selected) folder and update selected_files_in_folders
-                            files_in_current_folder = list_files_in_folder(st.session_state[KEY_PREFIX + '_current_path'])
-                            # Remove files from current folder and then add the new list to avoid duplicates
-                            st.session_state[KEY_PREFIX + '_selected_files_in_folders'] = [
-                                f for f in st.session_state[KEY_PREFIX + '_selected_files_in_folders']
-                                if not f.startswith(st.session_state[KEY_PREFIX + '_current_path'])
-                            ]
-                            st.session_state[KEY_PREFIX + '_selected_files_in_folders'].extend(files_in_current_folder)
+                        _refresh_selected_files_in_current_folder()
                     else:
                         st.error(f"Failed to upload '{uploaded_file.name}'")
                 st.session_state[KEY_PREFIX + '_show_upload'] = False # Hide upload section after upload
@@ -653,16 +1031,22 @@ def main():
                     else:
                         st.error("Failed to load CSV/TSV content.")
                 elif file_path.endswith((".xlsx", ".xls")):
-                    file_content = download_file_from_s3(file_path)
-                    if file_content:
+                    etag = get_s3_etag(file_path)
+                    if etag:
                         try:
-                            if file_path.endswith(".xlsx"):
-                                df = pd.read_excel(BytesIO(file_content), engine='openpyxl') # Specify engine for xlsx
-                            elif file_path.endswith(".xls"):
-                                df = pd.read_excel(BytesIO(file_content), engine='xlrd') # Specify engine for xls
-                            else: # Fallback if somehow extension is not recognized
-                                df = pd.read_excel(BytesIO(file_content)) # Let pandas try to infer
+                            sheet_key = f"{KEY_PREFIX}_excel_sheet_{file_path}"
+                            rows_key = f"{KEY_PREFIX}_excel_rows_{file_path}"
+                            n_rows = st.session_state.get(rows_key, EXCEL_PREVIEW_ROW_OPTIONS[1])
+                            sheet_names, df = load_excel_preview(file_path, etag, st.session_state.get(sheet_key), n_rows)
+                            if st.session_state.get(sheet_key) not in sheet_names: # Workbook changed since the sheet was picked
+                                st.session_state.pop(sheet_key, None)
+                            col_sheet, col_rows = st.columns([3, 1])
+                            with col_sheet:
+                                st.selectbox("Sheet", options=sheet_names, key=sheet_key)
+                            with col_rows:
+                                st.selectbox("Rows", options=EXCEL_PREVIEW_ROW_OPTIONS, index=1, key=rows_key)
                             st.dataframe(df)
+                            st.caption(f"Showing up to the first {n_rows} rows.")
                         except Exception as e:
                             st.error(f"Error reading Excel file: {e}")
                     else:
@@ -728,27 +1112,22 @@ def main():
                             st.error(f"Error displaying code file: {e}")
                     else:
                         st.error("Failed to load code file content.")
-                elif file_path.endswith((".ppt", ".pptx")):
-                    file_content = download_file_from_s3(file_path)
-                    if file_content:
+                elif file_path.endswith(".ppt"):
+                    st.write("Legacy PowerPoint (.ppt) file detected. Preview is only available for .pptx files.")
+                elif file_path.endswith(".pptx"):
+                    etag = get_s3_etag(file_path)
+                    if etag:
                         try:
-                            prs = Presentation(BytesIO(file_content))
-                            pdf_buffer = BytesIO()
-                            c = canvas.Canvas(pdf_buffer, pagesizes=letter)
-
-                            for slide in prs.slides:
-                                c.drawString(100, 750, f"Slide {prs.slides.index(slide) + 1}")
-                                for shape in slide.shapes:
-                                    if hasattr(shape, 'text'):
-                                        c.drawString(100, 700, shape.text[:50])  # Truncate long texts
-                                c.showPage()
-
-                            c.save()
-                            pdf_bytes = base64.b64encode(pdf_buffer.getvalue()).decode('utf-8') # Corrected base64 encoding
-                            pdf_display = f'<iframe src="data:application/pdf;base64,{pdf_bytes}" width="100%" height="500px" type="application/pdf"></iframe>'
-                            st.markdown(pdf_display, unsafe_allow_html=True)
-                        except ImportError:
-                            st.write("PowerPoint file detected. Preview not available due to missing dependencies.")
+                            with st.spinner("Extracting slides..."):
+                                slides = load_pptx_outline(file_path, etag)
+                            visible_key = f"{KEY_PREFIX}_pptx_visible_{file_path}"
+                            visible_count = st.session_state.get(visible_key, PPTX_SLIDES_PER_BATCH)
+                            st.write(f"File type: PowerPoint ({len(slides)} slides)")
+                            _render_pptx_slides(slides[:visible_count]) # Render in batches instead of every slide at once
+                            if visible_count < len(slides):
+                                if st.button(f"Show more slides ({visible_count} of {len(slides)} shown)", key=f"{KEY_PREFIX}_pptx_more_{file_path}"):
+                                    st.session_state[visible_key] = visible_count + PPTX_SLIDES_PER_BATCH
+                                    st.rerun()
                         except Exception as e:
                             st.error(f"Error displaying PowerPoint: {e}")
                     else: